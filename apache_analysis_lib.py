@@ -8,15 +8,139 @@ and badges scripts for analyzing Apache repositories.
 
 import subprocess
 import logging
+import os
 import re
+import hashlib
+import heapq
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from collections import defaultdict
+from functools import lru_cache
+from itertools import islice
+from typing import NamedTuple
+
+try:
+    import pygit2
+except ImportError:
+    # Optional: without it, commit history is read by streaming git log
+    pygit2 = None
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent network-touching git commands (fetches), to
+# stay clear of GitHub rate limits no matter how many threads call in
+MAX_NETWORK_JOBS = 8
+
+# Wall-clock limit in seconds for streamed git commands such as a full
+# history git log, which can legitimately run far longer than 30 seconds
+GIT_STREAM_TIMEOUT = 600
+
+# Environment for git commands run during analysis, which must only read
+# objects that are already local: keeps git from lazily fetching objects
+# that a partial clone left out
+LOCAL_ONLY_GIT_ENV = {'GIT_NO_LAZY_FETCH': '1'}
+
+# Characters read per call when splitting streamed git output on NUL
+STREAM_CHUNK_SIZE = 1 << 16
+
+# Bump whenever the shape of the cached contributor data changes
+CONTRIBUTORS_CACHE_VERSION = 6
+
+# Commits kept per contributor, oldest first; enough to find the highest
+# milestone (the 1000th commit). Later commits are only counted.
+EARLY_COMMITS_KEPT = 1000
+
+# Common bot indicators in names
+BOT_NAME_PATTERNS = [
+    '[bot]',
+    'jenkins',
+    'ci',
+    'continuous integration',
+    'github-actions',
+    'dependabot',
+    'renovate',
+    'codecov',
+    'travis',
+    'circleci',
+    'appveyor',
+    'buildbot',
+    'automation',
+    'auto-commit'
+]
+
+# Common bot indicators in emails
+BOT_EMAIL_PATTERNS = [
+    'jenkins',
+    'ci@',
+    'automation@',
+    'github-actions',
+    'dependabot',
+    'renovate',
+    'codecov',
+    'travis',
+    'circleci',
+    'appveyor',
+    'buildbot'
+]
+
+# Indicators of automated senders in either name or email
+NOREPLY_PATTERNS = ['noreply', 'donotreply', 'no-reply']
+
+# Bot indicators within users.noreply.github.com addresses, which otherwise
+# belong to real users hiding their email
+GITHUB_BOT_PATTERNS = ['dependabot', 'renovate', 'github-actions', 'bot']
+
+# Email domains used only by bots
+BOT_DOMAINS = ('dependabot.com', 'renovatebot.com', 'codecov.io')
+
+# Each pattern list is merged into one alternation so a single regex scan
+# replaces a Python-level substring check per pattern
+BOT_NAME_RE = re.compile('|'.join(map(re.escape, BOT_NAME_PATTERNS)))
+BOT_EMAIL_RE = re.compile('|'.join(map(re.escape, BOT_EMAIL_PATTERNS)))
+NOREPLY_RE = re.compile('|'.join(map(re.escape, NOREPLY_PATTERNS)))
+GITHUB_BOT_RE = re.compile('|'.join(map(re.escape, GITHUB_BOT_PATTERNS)))
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+# GitHub privacy addresses: username@ or 12345678+username@users.noreply.github.com
+GITHUB_NOREPLY_RE = re.compile(r'^(?:\d+\+)?(?P<user>[^@]+)@users\.noreply\.github\.com$', re.IGNORECASE)
+
+class Commit(NamedTuple):
+    """A single commit in a contributor's history, ordered by date."""
+    date: datetime
+    hash: str
+
+class GitCommandError(Exception):
+    """Raised when a streamed git command fails or times out."""
+
+class DisjointSet:
+    """Minimal union-find over hashable items."""
+    
+    def __init__(self):
+        self.parent = {}
+    
+    def find(self, item):
+        """Return the representative of item's set, adding item if unseen."""
+        parent = self.parent
+        parent.setdefault(item, item)
+        while parent[item] != item:
+            # Path halving keeps the trees shallow
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+    
+    def union(self, a, b):
+        """Merge the sets containing a and b."""
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
 class ApacheAnalysisBase:
     """Base class with shared functionality for Apache repository analysis."""
     
@@ -30,15 +154,29 @@ class ApacheAnalysisBase:
         # All repositories are now in the REPOSITORIES subdirectory
         self.repositories_dir = self.base_dir / 'REPOSITORIES'
         
-    def run_git_command(self, repo_path, command):
-        """Run a git command in the specified repository."""
+        # Parsed per-repository contributor data, reused while refs are unchanged
+        self.cache_dir = self.base_dir / '.cache' / 'contributors'
+        
+        # Shared by all threads performing network operations
+        self.network_semaphore = threading.BoundedSemaphore(MAX_NETWORK_JOBS)
+        
+        # (repo path, contributors) for the most recently read repository, so
+        # analyses that follow each other on the same repository share one read
+        self._last_contributors = None
+        
+    def run_git_command(self, repo_path, command, local_only=False):
+        """Run a git command in the specified repository.
+        
+        With local_only, git is not allowed to fetch missing objects.
+        """
         try:
             result = subprocess.run(
                 ['git'] + command,
                 cwd=repo_path,
                 capture_output=True,
                 text=True,
-                timeout=30
+                timeout=30,
+                env=dict(os.environ, **LOCAL_ONLY_GIT_ENV) if local_only else None
             )
             if result.returncode == 0:
                 return result.stdout.strip()
@@ -52,28 +190,334 @@ class ApacheAnalysisBase:
             logger.error(f"Error running git command in {repo_path}: {e}")
             return None
     
+    def _remote_branches_unchanged(self, repo_path):
+        """Check whether a fetch would leave every remote-tracking ref as it is.
+        
+        Asks each remote for its branches with `git ls-remote`, which costs
+        one ref advertisement and no object negotiation, and compares them
+        with the local refs they are fetched into. Only the plain
+        `refs/heads/*:<prefix>/*` refspecs set up by clone are understood;
+        anything else, or any error, counts as changed.
+        """
+        remotes = self.run_git_command(repo_path, ['remote'])
+        if not remotes:
+            return False
+        
+        for remote in remotes.split():
+            refspecs = self.run_git_command(repo_path, ['config', '--get-all', f'remote.{remote}.fetch'])
+            if not refspecs or len(refspecs.split()) != 1:
+                return False
+            source, _, destination = refspecs.lstrip('+').partition(':')
+            if source != 'refs/heads/*' or not destination.endswith('/*'):
+                return False
+            prefix = destination[:-1]
+            
+            advertised = self.run_git_command(repo_path, ['ls-remote', '--heads', remote])
+            local = self.run_git_command(repo_path, [
+                'for-each-ref', '--format=%(objectname) %(refname) %(symref)', prefix])
+            if advertised is None or local is None:
+                return False
+            
+            remote_branches = {}
+            for line in advertised.splitlines():
+                oid, _, refname = line.partition('\t')
+                remote_branches[prefix + refname[len('refs/heads/'):]] = oid
+            
+            # Skip symbolic refs such as refs/remotes/origin/HEAD
+            local_branches = {}
+            for line in local.splitlines():
+                oid, refname, symref = (line.split(' ') + [''])[:3]
+                if not symref:
+                    local_branches[refname] = oid
+            
+            if remote_branches != local_branches:
+                return False
+        
+        return True
+    
+    def _fetch_mailmap(self, repo_path):
+        """Make sure the .mailmap committed at HEAD is available locally.
+        
+        A --filter=tree:0 clone has no trees or blobs, and analysis only
+        reads local objects (libgit2 cannot fetch missing ones at all).
+        Letting git fetch HEAD's root tree on demand would bring every tree
+        below it along, so the root tree and the .mailmap blob are fetched
+        by id instead: two objects, however large the repository.
+        """
+        # Missing objects can only be fetched from a promisor remote
+        for remote in (self.run_git_command(repo_path, ['remote']) or '').split():
+            promisor = self.run_git_command(repo_path, [
+                'config', '--type=bool', '--get', '--default', 'false', f'remote.{remote}.promisor'])
+            if promisor == 'true':
+                break
+        else:
+            # Not a partial clone, so nothing is missing
+            return
+        
+        commit = self.run_git_command(repo_path, ['cat-file', 'commit', 'HEAD'], local_only=True)
+        if not commit:
+            return
+        # A commit object starts with its "tree <id>" line
+        self._fetch_object(repo_path, remote, commit.split('\n', 1)[0].split(' ', 1)[1])
+        
+        listing = self.run_git_command(repo_path, ['ls-tree', 'HEAD', '.mailmap'], local_only=True)
+        if listing:
+            self._fetch_object(repo_path, remote, listing.split()[2])
+    
+    def _fetch_object(self, repo_path, remote, object_id):
+        """Fetch one object of a partial clone by id, unless it is already local."""
+        try:
+            present = subprocess.run(
+                ['git', 'cat-file', '-e', object_id],
+                cwd=repo_path,
+                capture_output=True,
+                timeout=30,
+                env=dict(os.environ, **LOCAL_ONLY_GIT_ENV)
+            ).returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            present = False
+        
+        if not present:
+            # The filter leaves out everything below the requested object,
+            # but never the object itself
+            self.run_git_command(repo_path, [
+                'fetch', '--no-tags', '--no-write-fetch-head', '--filter=tree:0', remote, object_id
+            ])
+    
     def update_repository(self, repo_path):
         """Update a repository with metadata only."""
         logger.info(f"Updating repository: {repo_path}")
         
-        # Fetch all remote refs without downloading objects
-        fetch_result = self.run_git_command(repo_path, ['fetch', '--all'])
-        if fetch_result is None:
-            return False
+        # Refs or the mailmap may change; don't hand out contributors read before that
+        self._last_contributors = None
+        
+        with self.network_semaphore:
+            if self._remote_branches_unchanged(repo_path):
+                logger.info(f"Repository already up to date: {repo_path}")
+            else:
+                # Fetch all remote refs without downloading trees or file contents;
+                # fetch --all already updates every remote, as `remote update` would
+                fetch_result = self.run_git_command(repo_path, [
+                    'fetch', '--all', '--prune', '--no-tags', '--filter=tree:0'
+                ])
+                if fetch_result is None:
+                    return False
             
-        # Update remote tracking branches
-        update_result = self.run_git_command(repo_path, ['remote', 'update'])
-        if update_result is None:
-            return False
+            self._fetch_mailmap(repo_path)
             
         return True
     
+    def update_repositories(self, repositories, jobs=MAX_NETWORK_JOBS):
+        """Update several repositories concurrently.
+        
+        Fetches are network-bound and independent of each other, so they are
+        spread over a thread pool. Yields (repo_path, success) as each update
+        finishes, on the caller's thread, so callers can report progress.
+        """
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(self.update_repository, repo_path): repo_path
+                       for repo_path in repositories}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+    
+    def run_git_command_streaming(self, repo_path, command, timeout=GIT_STREAM_TIMEOUT, separator=None,
+                                  local_only=False):
+        """Run a git command in the specified repository, yielding output lines.
+        
+        Output is consumed as git produces it instead of being buffered in
+        full, so memory use does not grow with the size of the output. The
+        process is killed if it is still running after timeout seconds.
+        
+        With a separator (such as '\x00' for commands run with -z), the output
+        is read in fixed-size chunks and split on it instead of on newlines.
+        
+        With local_only, git is not allowed to fetch missing objects.
+        
+        Raises GitCommandError once the output is exhausted if the command
+        failed, so callers can tell partial output from a complete one.
+        """
+        try:
+            process = subprocess.Popen(
+                ['git'] + command,
+                cwd=repo_path,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                encoding='utf-8',
+                errors='replace',
+                # Fewer, larger pipe reads than the 8 KiB default
+                bufsize=STREAM_CHUNK_SIZE,
+                env=dict(os.environ, **LOCAL_ONLY_GIT_ENV) if local_only else None
+            )
+        except Exception as e:
+            logger.error(f"Error running git command in {repo_path}: {e}")
+            raise GitCommandError(str(e)) from e
+        
+        timed_out = threading.Event()
+        
+        def kill():
+            timed_out.set()
+            process.kill()
+        
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+        try:
+            with process:
+                if separator is None:
+                    for line in process.stdout:
+                        yield line.rstrip('\n')
+                else:
+                    pending = ''
+                    while True:
+                        chunk = process.stdout.read(STREAM_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        fields = (pending + chunk).split(separator)
+                        # The last piece may continue in the next chunk
+                        pending = fields.pop()
+                        yield from fields
+                    if pending:
+                        yield pending
+                stderr = process.stderr.read()
+        finally:
+            timer.cancel()
+        
+        if timed_out.is_set():
+            logger.error(f"Git command timed out in {repo_path}")
+            raise GitCommandError(f"timed out after {timeout} seconds")
+        if process.returncode != 0:
+            logger.warning(f"Git command failed in {repo_path}: {stderr}")
+            raise GitCommandError(stderr.strip())
+    
+    def iter_commits(self, repo_path, include=None, exclude=()):
+        """Stream (name, email, date, hash) for every commit on all refs, parents first.
+        
+        include and exclude narrow this down to the commits reachable from
+        the object ids in include (instead of from every ref) but not from
+        any of those in exclude, like `git log include --not exclude`.
+        
+        When pygit2 is installed the history is walked in-process by libgit2,
+        in topological order only. Otherwise a single git log process is kept
+        open for the whole repository and its output, also ordered by author
+        date, is consumed as it is produced. Either way author dates come from
+        unix timestamps, so no date string parsing is needed, and names and
+        emails are canonicalized through the repository's .mailmap.
+        """
+        if pygit2 is not None:
+            commits = self._read_commits_pygit2(repo_path, include, exclude)
+            if commits is not None:
+                for name, email, timestamp, commit_hash in commits:
+                    yield name, email, datetime.fromtimestamp(timestamp, timezone.utc), commit_hash
+                return
+        
+        # NUL cannot appear in names or emails; with -z it also ends each
+        # commit, so the output is one flat run of NUL-separated fields
+        revisions = ['--all'] if include is None else list(include)
+        if exclude:
+            revisions += ['--not'] + list(exclude)
+        fields = self.run_git_command_streaming(repo_path, [
+            'log', '--author-date-order', '--reverse', '-z',
+            '--pretty=format:%aN%x00%aE%x00%at%x00%H'
+        ] + revisions, separator='\x00', local_only=True)
+        
+        for author_name, author_email, timestamp, commit_hash in zip(fields, fields, fields, fields):
+            try:
+                commit_datetime = datetime.fromtimestamp(int(timestamp), timezone.utc)
+            except ValueError:
+                # Not a unix timestamp, fall back to the string parser
+                commit_datetime = self.parse_git_date(timestamp)
+            
+            yield author_name, author_email, commit_datetime, commit_hash
+    
+    def _read_commits_pygit2(self, repo_path, include=None, exclude=()):
+        """Return an iterator of (name, email, unix time, hash) for iter_commits(), read through libgit2.
+        
+        Rows are produced as the walk reaches each commit, so the history is
+        never held in memory. Returns None if libgit2 cannot open the
+        repository.
+        
+        The iterator raises GitCommandError if the history could not be
+        walked completely.
+        """
+        try:
+            repo = pygit2.Repository(str(repo_path))
+        except pygit2.GitError as e:
+            logger.debug(f"pygit2 cannot open {repo_path}, using git log: {e}")
+            return None
+        
+        mailmap = self._load_mailmap(repo, repo_path)
+        
+        walker = repo.walk(None, pygit2.enums.SortMode.TOPOLOGICAL | pygit2.enums.SortMode.REVERSE)
+        if include is None:
+            # Same starting points as git log --all: every ref, plus a detached HEAD
+            for ref in repo.references.iterator():
+                try:
+                    walker.push(ref.peel(pygit2.Commit).id)
+                except (pygit2.GitError, KeyError, ValueError):
+                    # Refs to trees or blobs, or to objects that are missing
+                    continue
+            if repo.head_is_detached:
+                walker.push(repo.head.target)
+        else:
+            try:
+                for oid in include:
+                    walker.push(repo[oid].peel(pygit2.Commit).id)
+                for oid in exclude:
+                    walker.hide(repo[oid].peel(pygit2.Commit).id)
+            except (pygit2.GitError, KeyError, ValueError) as e:
+                raise GitCommandError(f"cannot walk from the given commits: {e}") from e
+        
+        return self._walk_commits_pygit2(repo_path, walker, mailmap)
+    
+    def _walk_commits_pygit2(self, repo_path, walker, mailmap):
+        """Yield (name, email, unix time, hash) for each commit a pygit2 walker reaches."""
+        try:
+            for commit in walker:
+                author = commit.author
+                name, email = mailmap.resolve(author.raw_name.decode('utf-8', 'replace'),
+                                              author.raw_email.decode('utf-8', 'replace'))
+                yield name, email, author.time, str(commit.id)
+        except (pygit2.GitError, KeyError) as e:
+            logger.warning(f"Failed to walk history of {repo_path}: {e}")
+            raise GitCommandError(str(e))
+    
+    def _load_mailmap(self, repo, repo_path):
+        """Return the repository's mailmap as a pygit2.Mailmap (empty if it has none).
+        
+        Only local objects are read; update_repository fetches the .mailmap
+        of a partial clone.
+        """
+        try:
+            return pygit2.Mailmap.from_repository(repo)
+        except pygit2.GitError as e:
+            logger.warning(f"Ignoring unreadable mailmap in {repo_path}: {e}")
+            return pygit2.Mailmap()
+    
     def parse_git_date(self, date_str):
-        """Parse git date string and return timezone-aware datetime."""
+        """Parse git date string and return timezone-aware datetime.
+        
+        Commit dates are normally read as unix timestamps; this is only used
+        as a fallback for dates in git's ISO format.
+        """
+        return self._parse_git_date_cached(date_str)
+    
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def _parse_git_date_cached(date_str):
+        """parse_git_date() proper, memoized: the datetimes it returns are immutable."""
+        # Fast path for the fixed-width format git prints: 2025-01-27 10:30:45 -0800
+        if len(date_str) == 25 and date_str[19] == ' ' and date_str[20] in '+-':
+            try:
+                offset = timedelta(hours=int(date_str[21:23]), minutes=int(date_str[23:25]))
+                return datetime(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]),
+                                int(date_str[11:13]), int(date_str[14:16]), int(date_str[17:19]),
+                                tzinfo=timezone(-offset if date_str[20] == '-' else offset))
+            except ValueError:
+                pass
+        
         try:
             # Git ISO format: 2025-01-27 10:30:45 -0800
             # Remove any extra whitespace and normalize
-            date_str = re.sub(r'\s+', ' ', date_str.strip())
+            date_str = WHITESPACE_RE.sub(' ', date_str.strip())
             
             # Try to parse with timezone
             if '+' in date_str or date_str.count('-') > 2:
@@ -101,64 +545,28 @@ class ApacheAnalysisBase:
     
     def is_bot_or_ci(self, author_name, author_email):
         """Check if a contributor appears to be a bot or CI system."""
+        return self._is_bot_or_ci_cached(author_name, author_email)
+    
+    @staticmethod
+    @lru_cache(maxsize=100_000)
+    def _is_bot_or_ci_cached(author_name, author_email):
+        """is_bot_or_ci() proper, memoized: each author appears on many commits."""
         # Convert to lowercase for case-insensitive matching
         name_lower = author_name.lower()
         email_lower = author_email.lower()
         
-        # Common bot indicators in names
-        bot_name_patterns = [
-            '[bot]',
-            'jenkins',
-            'ci',
-            'continuous integration',
-            'github-actions',
-            'dependabot',
-            'renovate',
-            'codecov',
-            'travis',
-            'circleci',
-            'appveyor',
-            'buildbot',
-            'automation',
-            'auto-commit'
-        ]
-        
-        # Common bot indicators in emails
-        bot_email_patterns = [
-            'jenkins',
-            'ci@',
-            'automation@',
-            'github-actions',
-            'dependabot',
-            'renovate',
-            'codecov',
-            'travis',
-            'circleci',
-            'appveyor',
-            'buildbot'
-        ]
-        
         # Check name patterns first
-        for pattern in bot_name_patterns:
-            if pattern in name_lower:
-                return True
+        if BOT_NAME_RE.search(name_lower):
+            return True
         
         # Check email patterns
-        for pattern in bot_email_patterns:
-            if pattern in email_lower:
-                return True
-        
-        # Check for specific bot email domains
-        bot_domains = [
-            'dependabot.com',
-            'renovatebot.com',
-            'codecov.io'
-        ]
+        if BOT_EMAIL_RE.search(email_lower):
+            return True
         
         # Handle GitHub noreply addresses carefully
         if 'users.noreply.github.com' in email_lower:
             # Check if it's a known bot using this domain by looking for bot indicators in the email
-            if any(bot_indicator in email_lower for bot_indicator in ['dependabot', 'renovate', 'github-actions', 'bot']):
+            if GITHUB_BOT_RE.search(email_lower):
                 return True
             # Otherwise, it's typically a real user using GitHub's privacy feature
             return False
@@ -166,14 +574,12 @@ class ApacheAnalysisBase:
             # This is typically a bot or automated system
             return True
         
-        # Check other bot domains
-        for domain in bot_domains:
-            if email_lower.endswith(domain):
-                return True
+        # Check for specific bot email domains
+        if email_lower.endswith(BOT_DOMAINS):
+            return True
         
         # Additional checks for common bot/CI patterns
-        if any(pattern in name_lower for pattern in ['noreply', 'donotreply', 'no-reply']) or \
-           any(pattern in email_lower for pattern in ['noreply', 'no-reply', 'donotreply']):
+        if NOREPLY_RE.search(name_lower) or NOREPLY_RE.search(email_lower):
             return True
         
         return False
@@ -182,155 +588,270 @@ class ApacheAnalysisBase:
         """
         Attempt to resolve contributor identities across different email addresses.
         This handles cases where the same person uses different email addresses over time.
+        
+        Email addresses and author names form a graph: two addresses belong to
+        the same person when they were ever used with the same (normalized)
+        name, directly or through a chain of other addresses. Each connected
+        component is merged into a single contributor.
         """
-        # Group contributors by normalized name
-        name_groups = defaultdict(list)
+        identities = DisjointSet()
+        name_owners = {}
         
         for email_key, info in contributors.items():
-            # Normalize the name (lowercase, remove extra spaces)
-            normalized_name = ' '.join(info['name'].lower().split())
-            name_groups[normalized_name].append((email_key, info))
+            identities.find(email_key)
+            for name in info.get('all_names', (info['name'],)):
+                # Normalize the name (lowercase, remove extra spaces)
+                normalized_name = ' '.join(name.lower().split())
+                identities.union(name_owners.setdefault(normalized_name, email_key), email_key)
+        
+        groups = defaultdict(list)
+        for email_key, info in contributors.items():
+            groups[identities.find(email_key)].append((email_key, info))
         
-        # For each name group, find the earliest commit across all email addresses
         resolved_contributors = {}
         
-        for normalized_name, email_infos in name_groups.items():
+        for email_infos in groups.values():
             if len(email_infos) == 1:
-                # Single email for this name, use as-is
+                # Single email for this person, use as-is
                 email_key, info = email_infos[0]
                 resolved_contributors[email_key] = info
-            else:
-                # Multiple emails for the same name - merge all commit data
-                earliest_date = None
-                earliest_email = None
-                earliest_info = None
-                all_emails = []
-                all_commits = []
-                most_recent_name = None
-                
-                # Find the earliest commit across all emails for this person
-                for email_key, info in email_infos:
-                    all_emails.append(info['email'])
-                    if 'all_commits' in info:
-                        all_commits.extend(info['all_commits'])
-                    
-                    # Track the most recent name (from the latest commit)
-                    if most_recent_name is None or info['first_commit_date'] > earliest_info['first_commit_date']:
-                        most_recent_name = info['name']
-                    
-                    if earliest_date is None or info['first_commit_date'] < earliest_date:
-                        earliest_date = info['first_commit_date']
-                        earliest_email = email_key
-                        earliest_info = info.copy()
-                
-                # Remove duplicate commits (same hash)
-                unique_commits = {}
-                for commit in all_commits:
-                    unique_commits[commit['hash']] = commit
-                
-                # Update the earliest info with merged data
-                earliest_info['name'] = most_recent_name  # Use the most recent name
-                earliest_info['all_emails'] = list(set(all_emails))  # All unique emails
-                earliest_info['all_commits'] = list(unique_commits.values())
-                earliest_info['total_commits'] = len(unique_commits)
-                
-                resolved_contributors[earliest_email] = earliest_info
-                
-                # Log the identity resolution
-                earliest_date = earliest_info['first_commit_date']
-                logger.info(f"Resolved identity for '{most_recent_name}': {len(all_emails)} email addresses, {len(unique_commits)} total commits, earliest commit: {earliest_date.strftime('%Y-%m-%d')}")
+                continue
+            
+            # Multiple emails for the same person - the address with the earliest
+            # commit becomes the key, the most recently adopted name is kept
+            earliest_email, earliest_info = min(email_infos, key=lambda item: item[1]['first_commit_date'])
+            most_recent_name = max(email_infos, key=lambda item: item[1]['first_commit_date'])[1]['name']
+            
+            # Every commit has exactly one author address, so the lists never
+            # overlap and need no de-duplication. They are each sorted already,
+            # and the person's first commits are among each address's first
+            # commits, so a lazy merge that stops at the cap is all it takes.
+            early_commits = list(islice(
+                heapq.merge(*(info.get('early_commits', ()) for _, info in email_infos)),
+                EARLY_COMMITS_KEPT))
+            total_commits = sum(info['total_commits'] for _, info in email_infos)
+            
+            earliest_info['name'] = most_recent_name
+            earliest_info['all_emails'] = [info['email'] for _, info in email_infos]
+            earliest_info['early_commits'] = early_commits
+            earliest_info['total_commits'] = total_commits
+            
+            resolved_contributors[earliest_email] = earliest_info
+            
+            # Log the identity resolution
+            logger.info(f"Resolved identity for '{most_recent_name}': {len(email_infos)} email addresses, {total_commits} total commits, earliest commit: {earliest_info['first_commit_date'].strftime('%Y-%m-%d')}")
         
         return resolved_contributors
 
+    def get_refs_state(self, repo_path):
+        """Return (fingerprint, tips) for the repository's refs, or (None, None).
+        
+        The fingerprint is a hash identifying the current target of every
+        ref; tips is the sorted list of distinct object ids they point at.
+        """
+        refs = self.run_git_command(repo_path, ['for-each-ref', '--format=%(objectname) %(refname)'])
+        if refs is None:
+            return None, None
+        tips = sorted({line.split(' ', 1)[0] for line in refs.splitlines() if line})
+        return hashlib.sha1(refs.encode('utf-8')).hexdigest(), tips
+    
+    def get_mailmap_id(self, repo_path):
+        """Return the object id of the .mailmap committed at HEAD, reading only local objects.
+        
+        Returns '' if there is none, and None if there is one (or may be
+        one) that is not available locally, as in a partial clone that has
+        not been through update_repository yet. History read then is not
+        canonicalized through the mailmap and must not be cached.
+        """
+        listing = self.run_git_command(repo_path, ['ls-tree', 'HEAD', '.mailmap'], local_only=True)
+        if listing is None:
+            # Without a HEAD commit there is no mailmap for git or libgit2 to
+            # read either; otherwise the root tree is missing
+            if self.run_git_command(repo_path, ['rev-parse', '-q', '--verify', 'HEAD'], local_only=True) is None:
+                return ''
+            return None
+        if not listing:
+            return ''
+        
+        blob_id = listing.split()[2]
+        if self.run_git_command(repo_path, ['cat-file', '-e', blob_id], local_only=True) is None:
+            return None
+        return blob_id
+    
+    def _refs_only_advanced(self, repo_path, old_tips, new_tips):
+        """Check that every old ref tip is still reachable from the new ones.
+        
+        This fails when history was rewritten or branches were deleted, in
+        which case commits counted before may no longer be part of the
+        repository.
+        """
+        if not old_tips:
+            return True
+        if not new_tips:
+            return False
+        count = self.run_git_command(repo_path, ['rev-list', '--count'] + old_tips + ['--not'] + new_tips,
+                                     local_only=True)
+        return count is not None and count.strip() == '0'
+    
+    def _contributors_cache_file(self, repo_path):
+        """Return the cache file used for a repository's contributor data."""
+        repo_key = hashlib.sha1(str(Path(repo_path).resolve()).encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{repo_key}.pkl"
+    
+    def _load_contributors_cache(self, repo_path):
+        """Return the cached contributor state for a repository, or None."""
+        try:
+            with open(self._contributors_cache_file(repo_path), 'rb') as f:
+                cached = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable contributor cache for {repo_path}: {e}")
+            return None
+        
+        if cached.get('version') != CONTRIBUTORS_CACHE_VERSION:
+            return None
+        return cached
+    
+    def _save_contributors_cache(self, repo_path, state):
+        """Store a repository's contributor state (see get_all_contributors)."""
+        cache_file = self._contributors_cache_file(repo_path)
+        tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(dict(state, version=CONTRIBUTORS_CACHE_VERSION),
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logger.warning(f"Failed to write contributor cache for {repo_path}: {e}")
+    
     def get_all_contributors(self, repo_path):
         """Get all contributors and their first commit dates.
         
         This method finds the very first commit ever made by each contributor
         in the entire history of the repository across all branches, with
         identity resolution to handle email address changes.
+        
+        Results are cached on disk and reused for as long as none of the
+        repository's refs move. When refs have only moved forward, just the
+        new commits are read and added to the cached per-address data.
+        The last result is also kept in memory, so asking again for the
+        same repository costs nothing.
         """
-        # Get all commits with author info and dates across ALL branches and ALL time
-        log_output = self.run_git_command(repo_path, [
-            'log', '--all', '--pretty=format:%an|%ae|%ad|%H', '--date=iso'
-        ])
+        repo_key = str(repo_path)
+        last = self._last_contributors
+        if last is not None and last[0] == repo_key:
+            return last[1]
         
-        if not log_output:
-            return {}
-            
-        contributors = {}
-        commit_counts = {}  # Track total commits per contributor
+        fingerprint, tips = self.get_refs_state(repo_path)
+        mailmap_id = self.get_mailmap_id(repo_path)
+        cached = self._load_contributors_cache(repo_path) if fingerprint is not None else None
+        if cached is not None and (mailmap_id is None or cached['mailmap'] != mailmap_id):
+            # Names were canonicalized with another (or without the) mailmap
+            cached = None
         
-        for line in log_output.split('\n'):
-            if not line.strip():
-                continue
-                
+        if cached is not None and cached['fingerprint'] == fingerprint:
+            contributors = cached['contributors']
+        else:
+            if mailmap_id is None:
+                logger.warning(f"The .mailmap of {repo_path} is not available locally; reading its history "
+                               f"without it and not caching the result (update the repository to fetch it)")
             try:
-                parts = line.split('|')
-                if len(parts) != 4:
-                    continue
-                    
-                author_name, author_email, commit_date, commit_hash = parts
-                commit_datetime = self.parse_git_date(commit_date)
-                
-                # Filter out bots and CI systems
-                if self.is_bot_or_ci(author_name, author_email):
-                    continue
-                
-                # Use author email as key to avoid duplicates (same person, different names)
-                key = author_email.lower()
-                
-                # Count commits for this contributor
-                if key not in commit_counts:
-                    commit_counts[key] = []
-                commit_counts[key].append({
-                    'date': commit_datetime,
-                    'hash': commit_hash
-                })
-                
-                if key not in contributors:
-                    contributors[key] = {
-                        'name': author_name,
-                        'email': author_email,
-                        'first_commit_date': commit_datetime,
-                        'first_commit_hash': commit_hash
-                    }
+                if (cached is not None
+                        and self._refs_only_advanced(repo_path, cached['tips'], tips)):
+                    addresses = self.scan_contributors(repo_path, cached['addresses'], tips, cached['tips'])
                 else:
-                    # Update if this is an earlier commit (finding the VERY FIRST commit ever)
-                    if commit_datetime < contributors[key]['first_commit_date']:
-                        contributors[key]['first_commit_date'] = commit_datetime
-                        contributors[key]['first_commit_hash'] = commit_hash
-                        # Keep the name from the earliest commit
-                        contributors[key]['name'] = author_name
-                        
-            except (ValueError, IndexError) as e:
-                logger.warning(f"Failed to parse commit line: {line} - {e}")
-                continue
+                    addresses = self.scan_contributors(repo_path)
+            except GitCommandError:
+                # Partial history must not be cached or reported as complete
+                return {}
+            
+            # Identity resolution rewrites the entries it merges, so it works
+            # on copies and the per-address data stays reusable
+            contributors = self.normalize_contributor_identity(
+                {email_key: dict(info) for email_key, info in addresses.items()})
+            
+            if fingerprint is not None and mailmap_id is not None:
+                self._save_contributors_cache(repo_path, {
+                    'fingerprint': fingerprint,
+                    'tips': tips,
+                    'mailmap': mailmap_id,
+                    'addresses': addresses,
+                    'contributors': contributors
+                })
         
-        # Add commit counts and sort commits by date for each contributor
-        for key in contributors:
-            if key in commit_counts:
-                # Sort commits by date (oldest first)
-                commit_counts[key].sort(key=lambda x: x['date'])
-                contributors[key]['total_commits'] = len(commit_counts[key])
-                contributors[key]['all_commits'] = commit_counts[key]
-            else:
-                contributors[key]['total_commits'] = 0
-                contributors[key]['all_commits'] = []
+        self._last_contributors = (repo_key, contributors)
+        return contributors
+    
+    def scan_contributors(self, repo_path, contributors=None, include=None, exclude=()):
+        """Walk the history of a repository and collect contributors per email address.
         
-        # Apply identity resolution to handle email address changes
-        resolved_contributors = self.normalize_contributor_identity(contributors)
+        Each contributor gets a total_commits count, first_commit_date and
+        first_commit_hash, and early_commits: their first EARLY_COMMITS_KEPT
+        commits as Commit tuples, oldest first.
         
-        return resolved_contributors
+        Identity resolution is not applied. To update an earlier result,
+        pass it as contributors together with the ref tips it was read from
+        as exclude (and the current tips as include); only the new commits
+        are read, and the result is updated in place.
+        
+        Raises GitCommandError if the history could not be read completely.
+        """
+        if contributors is None:
+            contributors = {}
+        touched = set()
+        
+        for author_name, author_email, commit_datetime, commit_hash in self.iter_commits(repo_path, include, exclude):
+            # Filter out bots and CI systems
+            if self.is_bot_or_ci(author_name, author_email):
+                continue
+            
+            # Use author email as key to avoid duplicates (same person, different names)
+            key = author_email.lower()
+            
+            info = contributors.get(key)
+            if info is None:
+                contributors[key] = info = {
+                    'name': author_name,
+                    'email': author_email,
+                    'all_names': set(),
+                    'early_commits': [],
+                    'total_commits': 0,
+                    'first_commit_date': commit_datetime
+                }
+            elif commit_datetime < info['first_commit_date']:
+                # Commits need not arrive in date order; keep the name used
+                # on the earliest one
+                info['name'] = author_name
+                info['first_commit_date'] = commit_datetime
+            
+            info['all_names'].add(author_name)
+            info['total_commits'] += 1
+            early_commits = info['early_commits']
+            early_commits.append(Commit(commit_datetime, commit_hash))
+            if len(early_commits) >= 2 * EARLY_COMMITS_KEPT:
+                # Trim as we go so prolific authors never hold their whole history
+                early_commits.sort()
+                del early_commits[EARLY_COMMITS_KEPT:]
+            touched.add(key)
+        
+        for key in touched:
+            info = contributors[key]
+            # Parents come before children, which keeps the list close to
+            # date order, so this sort has little to do
+            info['early_commits'].sort()
+            del info['early_commits'][EARLY_COMMITS_KEPT:]
+            info['first_commit_date'], info['first_commit_hash'] = info['early_commits'][0]
+        
+        return contributors
     
-    def get_github_username(self, repo_path, author_name, author_email):
-        """Try to get GitHub username from commit info."""
-        # First try to get GitHub username from recent commits
-        if '@users.noreply.github.com' in author_email:
-            # Extract GitHub username from noreply email
-            # Format: 12345678+username@users.noreply.github.com
-            parts = author_email.split('@')[0]
-            if '+' in parts:
-                return parts.split('+')[1]
+    def get_github_username(self, author_name, author_email):
+        """Guess a GitHub username from an author's name and email, without running git."""
+        # Extract GitHub username from noreply email
+        match = GITHUB_NOREPLY_RE.match(author_email)
+        if match:
+            return match.group('user')
         
         # Check if author name looks like a GitHub username (no spaces, starts with letter/number)
         if ' ' not in author_name and re.match(r'^[a-zA-Z0-9]', author_name):
@@ -360,47 +881,65 @@ class ApacheAnalysisBase:
                     logger.error(f"Project directory not found: {project_dir}")
                     return repositories
                 
-            if (project_dir / '.git').exists():
+            if self._is_git_repo(project_dir):
                 # Direct repository
                 repositories.append(project_dir)
             else:
                 # Directory containing multiple repositories - search recursively
-                repositories.extend(self._find_git_repos_recursive(project_dir, max_depth=3))
+                repositories.extend(self._find_git_repos(project_dir, max_depth=3))
         else:
             # Find all repositories in REPOSITORIES directory
-            for project_dir in self.repositories_dir.iterdir():
-                if not project_dir.is_dir() or project_dir.name.startswith('.') or project_dir.name == 'backups':
+            for entry in self._scan_subdirectories(self.repositories_dir):
+                if entry.name.startswith('.') or entry.name == 'backups':
                     continue
                     
-                if (project_dir / '.git').exists():
+                if self._is_git_repo(entry.path):
                     # Direct repository
-                    repositories.append(project_dir)
+                    repositories.append(Path(entry.path))
                 else:
                     # Directory containing multiple repositories - search recursively
-                    repositories.extend(self._find_git_repos_recursive(project_dir, max_depth=3))
+                    repositories.extend(self._find_git_repos(entry.path, max_depth=3))
         
         return repositories
     
-    def _find_git_repos_recursive(self, directory, max_depth=3, current_depth=0):
-        """Recursively find git repositories up to max_depth levels."""
-        repositories = []
-        
-        if current_depth >= max_depth:
-            return repositories
-            
+    def _is_git_repo(self, path):
+        """Check whether path is the top of a git repository, bare or not."""
+        if os.path.exists(os.path.join(path, '.git')):
+            return True
+        return os.path.isfile(os.path.join(path, 'HEAD')) and os.path.isdir(os.path.join(path, 'objects'))
+    
+    def _scan_subdirectories(self, directory):
+        """Return an iterator over the subdirectory entries of directory."""
         try:
-            for item in directory.iterdir():
-                if not item.is_dir():
-                    continue
-                    
-                if (item / '.git').exists():
-                    # Found a git repository
-                    repositories.append(item)
-                else:
-                    # Recurse into subdirectory
-                    repositories.extend(self._find_git_repos_recursive(item, max_depth, current_depth + 1))
-        except (PermissionError, OSError):
+            with os.scandir(directory) as entries:
+                # DirEntry caches the file type from the directory listing,
+                # so is_dir() normally needs no extra stat() call
+                return iter([entry for entry in entries if entry.is_dir()])
+        except OSError:
             # Skip directories we can't read
-            pass
+            return iter(())
+    
+    def _find_git_repos(self, directory, max_depth=3):
+        """Find git repositories below directory, up to max_depth levels deep.
+        
+        Walks the tree depth-first with an explicit stack, returning
+        repositories in the same order a recursive walk would.
+        """
+        repositories = []
+        stack = [(self._scan_subdirectories(directory), 0)]
+        
+        while stack:
+            entries, depth = stack[-1]
+            entry = next(entries, None)
+            if entry is None:
+                stack.pop()
+                continue
             
+            if self._is_git_repo(entry.path):
+                # Found a git repository
+                repositories.append(Path(entry.path))
+            elif depth + 1 < max_depth:
+                # Descend into subdirectory
+                stack.append((self._scan_subdirectories(entry.path), depth + 1))
+        
         return repositories
@@ -10,6 +10,10 @@ import subprocess
 import requests
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Number of clones to run at once; each one is network-bound
+CLONE_JOBS = 16
 
 def get_apache_repos():
     """Fetch all Apache repositories from GitHub API"""
@@ -42,8 +46,15 @@ def get_project_dir(repo_name):
 def clone_repo_metadata(repo_url, target_dir):
     """Clone repository with metadata only (no files)"""
     os.makedirs(target_dir, exist_ok=True)
-    cmd = ["git", "clone", "--filter=blob:none", "--no-checkout", repo_url, target_dir]
+    # A bare clone without trees or blobs holds just the commit objects,
+    # which is all the analysis scripts ever read
+    cmd = ["git", "clone", "--bare", "--filter=tree:0", "--no-tags", repo_url, target_dir]
     subprocess.run(cmd, check=True, capture_output=True)
+    # Bare clones have no fetch refspec; map remote branches onto local ones
+    # so later fetches keep every branch up to date
+    for key, value in (("remote.origin.fetch", "+refs/heads/*:refs/heads/*"),
+                       ("remote.origin.promisor", "true")):
+        subprocess.run(["git", "-C", target_dir, "config", key, value], check=True, capture_output=True)
 
 def main():
     print("Fetching Apache repositories...")
@@ -59,6 +70,7 @@ def main():
     
     os.makedirs("REPOSITORIES", exist_ok=True)
     
+    pending = []
     for i, repo in enumerate(repos, 1):
         repo_name = repo['name']
         clone_url = repo['clone_url']
@@ -69,13 +81,25 @@ def main():
         if os.path.exists(target_path):
             print(f"[{i}/{total_repos}] Skipping {repo_name} (already exists)")
             continue
-            
-        print(f"[{i}/{total_repos}] Cloning {repo_name} -> {project_dir}/ ({total_repos - i} remaining)")
         
-        try:
-            clone_repo_metadata(clone_url, target_path)
-        except subprocess.CalledProcessError as e:
-            print(f"Error cloning {repo_name}: {e}")
+        pending.append((repo_name, clone_url, project_dir, target_path))
+    
+    total_pending = len(pending)
+    print(f"Cloning {total_pending} repositories using {CLONE_JOBS} parallel jobs")
+    
+    with ThreadPoolExecutor(max_workers=CLONE_JOBS) as executor:
+        futures = {
+            executor.submit(clone_repo_metadata, clone_url, target_path): (repo_name, project_dir)
+            for repo_name, clone_url, project_dir, target_path in pending
+        }
+        
+        for i, future in enumerate(as_completed(futures), 1):
+            repo_name, project_dir = futures[future]
+            try:
+                future.result()
+                print(f"[{i}/{total_pending}] Cloned {repo_name} -> {project_dir}/ ({total_pending - i} remaining)")
+            except subprocess.CalledProcessError as e:
+                print(f"Error cloning {repo_name}: {e}")
     
     print("Done!")
 
@@ -1,130 +1,258 @@
 #!/usr/bin/env -S uv run --script
 # /// script
-# dependencies = ["httpx"]
+# dependencies = ["httpx[http2]", "orjson"]
 # ///
 
+import asyncio
+import gc
+import hashlib
 import httpx
+import orjson
+import os
 import sys
-from datetime import datetime, timedelta
-from collections import defaultdict
-
-def get_date_range():
-    today = datetime.now()
-    last_month_start = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
-    last_month_end = today.replace(day=1) - timedelta(days=1)
-    return last_month_start, last_month_end
-
-def find_committers():
-    people_data = httpx.get("https://projects.apache.org/json/foundation/people.json").json()
-    ldap_data = httpx.get("https://whimsy.apache.org/public/public_ldap_people.json").json()
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import NamedTuple
+
+PEOPLE_URL = "https://projects.apache.org/json/foundation/people.json"
+LDAP_PEOPLE_URL = "https://whimsy.apache.org/public/public_ldap_people.json"
+COMMITTEE_INFO_URL = "https://whimsy.apache.org/public/committee-info.json"
+COMMITTEES_URL = "https://projects.apache.org/json/foundation/committees.json"
+RELEASES_URL = "https://projects.apache.org/json/foundation/releases.json"
+HTTP_TIMEOUT = 30.0
+FETCH_RETRIES = 3
+RETRY_BACKOFF = 0.3
+HTTP_CACHE_DIR = Path(__file__).resolve().parent / ".cache" / "http"
+
+class Period(NamedTuple):
+    prefixes: tuple       # YYYY-MM, for roster/release dates (YYYY-MM-DD)
+    ldap_prefixes: tuple  # YYYYMM, for LDAP timestamps (YYYYMMDDHHMMSSZ)
+    label: str
+
+def reporting_period(months=1):
+    """Return the Period covering the `months` full calendar months before this one."""
+    month_starts = []
+    first = date.today().replace(day=1)
+    for _ in range(months):
+        first = (first - timedelta(days=1)).replace(day=1)
+        month_starts.append(first)
+    month_starts.reverse()
+    
+    label = month_starts[0].strftime("%B %Y")
+    if months > 1:
+        label += f" through {month_starts[-1].strftime('%B %Y')}"
+    return Period(tuple(m.strftime("%Y-%m") for m in month_starts),
+                  tuple(m.strftime("%Y%m") for m in month_starts),
+                  label)
+
+LAST_MONTH = reporting_period()
+
+def _cache_files(url):
+    key = hashlib.sha1(url.encode()).hexdigest()
+    return HTTP_CACHE_DIR / f"{key}.json", HTTP_CACHE_DIR / f"{key}.headers"
+
+def _conditional_headers(url):
+    """Build If-None-Match / If-Modified-Since headers from a previous download."""
+    body_file, headers_file = _cache_files(url)
+    if not body_file.exists():
+        return {}
+    try:
+        validators = orjson.loads(headers_file.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return {}
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last-modified"):
+        headers["If-Modified-Since"] = validators["last-modified"]
+    return headers
+
+def _save_cached(url, response):
+    body_file, headers_file = _cache_files(url)
+    validators = {name: response.headers[name] for name in ("etag", "last-modified") if name in response.headers}
+    if not validators:
+        return
+    try:
+        HTTP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for path, data in ((body_file, response.content), (headers_file, orjson.dumps(validators))):
+            tmp_file = path.with_suffix(path.suffix + ".tmp")
+            tmp_file.write_bytes(data)
+            os.replace(tmp_file, path)
+    except OSError as e:
+        print(f"Warning: could not cache {url}: {e}", file=sys.stderr)
+
+async def _get_json(client, url):
+    headers = _conditional_headers(url)
+    # Retry dropped connections and 5xx answers from a busy whimsy/projects server
+    for attempt in range(FETCH_RETRIES):
+        try:
+            response = await client.get(url, headers=headers)
+        except httpx.TransportError:
+            if attempt == FETCH_RETRIES - 1:
+                raise
+        else:
+            if response.status_code < 500 or attempt == FETCH_RETRIES - 1:
+                break
+        await asyncio.sleep(RETRY_BACKOFF * (attempt + 1))
     
-    last_month_start, last_month_end = get_date_range()
-    new_committers = defaultdict(list)
+    if response.status_code == 304:
+        # Unchanged since the last run; reuse the body we already have
+        return orjson.loads(_cache_files(url)[0].read_bytes())
+    response.raise_for_status()
+    _save_cached(url, response)
+    # orjson builds the (multi-megabyte) documents much faster than stdlib json;
+    # decoding here lets one document parse while the others are still downloading
+    return orjson.loads(response.content)
+
+async def _fetch_json(urls):
+    # One HTTP/2 connection per host, with compressed transfers of the large documents;
+    # the transport also retries failed connection attempts on its own
+    transport = httpx.AsyncHTTPTransport(http2=True, retries=FETCH_RETRIES)
+    async with httpx.AsyncClient(transport=transport, timeout=HTTP_TIMEOUT,
+                                 headers={"Accept-Encoding": "gzip"}) as client:
+        return await asyncio.gather(*(_get_json(client, url) for url in urls))
+
+def fetch_all(*urls):
+    """Fetch several JSON documents concurrently, returned in the order given."""
+    return asyncio.run(_fetch_json(urls))
+
+def parse_ldap_ts(timestamp):
+    """Parse a fixed-width LDAP timestamp (YYYYMMDDHHMMSSZ) by slicing."""
+    return datetime(int(timestamp[0:4]), int(timestamp[4:6]), int(timestamp[6:8]),
+                    int(timestamp[8:10]), int(timestamp[10:12]), int(timestamp[12:14]))
+
+def group_by_project(rows):
+    """Group (project, ...) rows into [(project, [(...), ...])] ordered by project name.
     
+    Accepts any iterable, so the filtering generators below feed it directly.
+    The sort is stable, so rows keep their original order within a project.
+    The project is dropped from the grouped rows, leaving them ready for the
+    line templates below.
+    """
+    rows = sorted(rows, key=itemgetter(0))
+    return [(project, [row[1:] for row in group]) for project, group in groupby(rows, key=itemgetter(0))]
+
+# Report lines, filled from (name, id, date) and (release, date) rows
+PERSON_LINE = "  - %s (%s) on %s"
+RELEASE_LINE = "  - %s on %s"
+
+def write_lines(lines):
+    """Write a finished report to stdout in one call rather than a print per line."""
+    sys.stdout.write("\n".join(lines) + "\n")
+
+def iter_new_committers(people_data, ldap_data, prefixes):
+    """Yield (project, name, id, date) for accounts created in the period."""
+    ldap_people = ldap_data["people"]
     for person_id, person_info in people_data.items():
-        if person_id not in ldap_data["people"]:
+        ldap_person = ldap_people.get(person_id)
+        if ldap_person is None:
             continue
         
-        created = datetime.strptime(ldap_data["people"][person_id]["createTimestamp"], "%Y%m%d%H%M%SZ")
+        timestamp = ldap_person["createTimestamp"]
+        if not timestamp.startswith(prefixes):
+            continue
         
-        if last_month_start <= created <= last_month_end:
-            for group in person_info.get("groups", []):
-                if not group.endswith("-pmc") and group not in ["apldap", "incubator"]:
-                    new_committers[group].append({
-                        "name": person_info.get("name", person_id),
-                        "id": person_id,
-                        "date": created.strftime("%Y-%m-%d")
-                    })
-    
-    if new_committers:
-        total = sum(len(c) for c in new_committers.values())
-        print(f"In {last_month_start.strftime('%B, %Y')}, {len(new_committers)} projects added a total of {total} new committers\n")
-        for project in sorted(new_committers.keys()):
-            print(f"{project.upper()}:")
-            for committer in new_committers[project]:
-                print(f"  - {committer['name']} ({committer['id']}) on {committer['date']}")
-            print()
-    else:
-        print(f"No new committers added in {last_month_start.strftime('%B %Y')}")
+        name = person_info.get("name", person_id)
+        created = parse_ldap_ts(timestamp).strftime("%Y-%m-%d")
+        for group in person_info.get("groups", []):
+            if not group.endswith("-pmc") and group not in ("apldap", "incubator"):
+                yield group, name, person_id, created
 
-def find_pmc():
-    committee_data = httpx.get("https://whimsy.apache.org/public/committee-info.json").json()
-    committees_data = httpx.get("https://projects.apache.org/json/foundation/committees.json").json()
-    
-    last_month_start, last_month_end = get_date_range()
-    reporting_month = last_month_start.strftime("%Y-%m")
-    new_pmc_members = defaultdict(list)
-    new_projects = set()
-    
-    # Identify projects established in the reporting month
-    for committee in committees_data:
-        if committee.get("established") == reporting_month:
-            new_projects.add(committee.get("id", "").lower())
-    
+def iter_new_pmc_members(committee_data, prefixes):
+    """Yield (project, name, id, date) for PMC members added in the period."""
     for project_id, project_info in committee_data.get("committees", {}).items():
         if not project_info.get("pmc"):
             continue
         
-        for member_id, member_info in project_info.get("roster", {}).items():
+        roster = project_info.get("roster")
+        if not roster:
+            continue
+        
+        for member_id, member_info in roster.items():
             date_str = member_info.get("date")
-            if not date_str:
+            if not date_str or not date_str.startswith(prefixes):
                 continue
             
-            added = datetime.strptime(date_str, "%Y-%m-%d")
+            yield project_id, member_info.get("name", member_id), member_id, date_str
+
+def iter_releases(releases_data, prefixes):
+    """Yield (project, release, date) for releases made in the period."""
+    for project_id, releases in releases_data.items():
+        if not isinstance(releases, dict):
+            continue
+        
+        for release_name, release_date_str in releases.items():
+            if not isinstance(release_date_str, str) or not release_date_str.startswith(prefixes):
+                continue
             
-            if last_month_start <= added <= last_month_end:
-                new_pmc_members[project_id].append({
-                    "name": member_info.get("name", member_id),
-                    "id": member_id,
-                    "date": date_str
-                })
+            yield project_id, release_name, release_date_str
+
+def find_committers(people_data, ldap_data, period=LAST_MONTH):
+    new_committers = group_by_project(iter_new_committers(people_data, ldap_data, period.ldap_prefixes))
+    
+    if new_committers:
+        total = sum(len(committers) for _, committers in new_committers)
+        out = [f"In {period.label}, {len(new_committers)} projects added a total of {total} new committers", ""]
+        for project, committers in new_committers:
+            out.append(f"{project.upper()}:")
+            out.extend(map(PERSON_LINE.__mod__, committers))
+            out.append("")
+    else:
+        out = [f"No new committers added in {period.label}"]
+    write_lines(out)
+
+def find_pmc(committee_data, committees_data, period=LAST_MONTH):
+    new_projects = set()
+    
+    # Identify projects established in the reporting period
+    for committee in committees_data:
+        if committee.get("established") in period.prefixes:
+            new_projects.add(committee.get("id", "").lower())
+    
+    new_pmc_members = group_by_project(iter_new_pmc_members(committee_data, period.prefixes))
     
     if new_pmc_members:
-        total = sum(len(m) for m in new_pmc_members.values())
-        new_project_members = sum(len(m) for p, m in new_pmc_members.items() if p in new_projects)
+        total = sum(len(members) for _, members in new_pmc_members)
+        new_project_members = sum(len(members) for project, members in new_pmc_members if project in new_projects)
         
-        summary = f"In {last_month_start.strftime('%B, %Y')}, {len(new_pmc_members)} projects added a total of {total} new PMC members"
+        summary = f"In {period.label}, {len(new_pmc_members)} projects added a total of {total} new PMC members"
         if new_project_members > 0:
             summary += f". {new_project_members} of those are part of newly-established projects"
-        print(summary + "\n")
+        out = [summary, ""]
         
-        for project in sorted(new_pmc_members.keys()):
+        for project, members in new_pmc_members:
             project_label = f"{project.upper()}"
             if project in new_projects:
                 project_label += " 🎉 (New Project)"
-            print(f"{project_label}:")
-            for member in new_pmc_members[project]:
-                print(f"  - {member['name']} ({member['id']}) on {member['date']}")
-            print()
+            out.append(f"{project_label}:")
+            out.extend(map(PERSON_LINE.__mod__, members))
+            out.append("")
     else:
-        print(f"No new PMC members added in {last_month_start.strftime('%B %Y')}")
+        out = [f"No new PMC members added in {period.label}"]
+    write_lines(out)
 
-def find_releases():
-    releases_data = httpx.get("https://projects.apache.org/json/foundation/releases.json").json()
-    
-    last_month_start, last_month_end = get_date_range()
-    project_releases = defaultdict(list)
-    
-    for project_id, releases in releases_data.items():
-        for release_name, release_date_str in releases.items():
-            release_date = datetime.strptime(release_date_str, "%Y-%m-%d")
-            
-            if last_month_start <= release_date <= last_month_end:
-                project_releases[project_id].append({
-                    "name": release_name,
-                    "date": release_date_str
-                })
+def find_releases(releases_data, period=LAST_MONTH):
+    project_releases = group_by_project(iter_releases(releases_data, period.prefixes))
     
     if project_releases:
-        total = sum(len(r) for r in project_releases.values())
-        print(f"In {last_month_start.strftime('%B, %Y')}, {len(project_releases)} projects made {total} releases\n")
-        for project in sorted(project_releases.keys()):
-            print(f"{project.upper()}:")
-            for release in project_releases[project]:
-                print(f"  - {release['name']} on {release['date']}")
-            print()
+        total = sum(len(releases) for _, releases in project_releases)
+        out = [f"In {period.label}, {len(project_releases)} projects made {total} releases", ""]
+        for project, releases in project_releases:
+            out.append(f"{project.upper()}:")
+            out.extend(map(RELEASE_LINE.__mod__, releases))
+            out.append("")
     else:
-        print(f"No releases made in {last_month_start.strftime('%B %Y')}")
+        out = [f"No releases made in {period.label}"]
+    write_lines(out)
+
+# Report name -> (report function, URLs of the documents it takes, in order)
+REPORTS = {
+    "committers": (find_committers, (PEOPLE_URL, LDAP_PEOPLE_URL)),
+    "pmc": (find_pmc, (COMMITTEE_INFO_URL, COMMITTEES_URL)),
+    "releases": (find_releases, (RELEASES_URL,)),
+}
 
 if __name__ == "__main__":
     args = sys.argv[1:]
@@ -136,23 +264,43 @@ if __name__ == "__main__":
         print("  pmc           Show new PMC members added last month")
         print("  releases      Show releases made last month")
         print("  all           Show all reports (default)")
+        print("  --months N    Cover the last N full months instead of one")
         print("  -h, --help    Show this help message")
         print("\nExamples:")
         print("  find_activity.py")
         print("  find_activity.py committers")
         print("  find_activity.py pmc releases")
+        print("  find_activity.py --months 3 releases")
         sys.exit(0)
     
-    if not args or "all" in args:
-        find_committers()
-        print("\n" + "="*80 + "\n")
-        find_pmc()
-        print("\n" + "="*80 + "\n")
-        find_releases()
-    else:
-        if "committers" in args:
-            find_committers()
-        if "pmc" in args:
-            find_pmc()
-        if "releases" in args:
-            find_releases()
+    period = LAST_MONTH
+    if "--months" in args:
+        i = args.index("--months")
+        try:
+            months = int(args[i + 1])
+        except (IndexError, ValueError):
+            months = 0
+        if months < 1:
+            print("--months needs a positive number", file=sys.stderr)
+            sys.exit(2)
+        period = reporting_period(months)
+        del args[i:i + 2]
+    
+    show_all = not args or "all" in args
+    selected = [name for name in REPORTS if show_all or name in args]
+    
+    # A one-shot run that builds hundreds of thousands of acyclic dicts while
+    # decoding; generational collection passes over them would be wasted work
+    gc.disable()
+    try:
+        # Download everything the selected reports need in one concurrent batch
+        urls = list(dict.fromkeys(url for name in selected for url in REPORTS[name][1]))
+        documents = dict(zip(urls, fetch_all(*urls)))
+        
+        for i, name in enumerate(selected):
+            if show_all and i:
+                print("\n" + "="*80 + "\n")
+            report, report_urls = REPORTS[name]
+            report(*(documents[url] for url in report_urls), period=period)
+    finally:
+        gc.enable()
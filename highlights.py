@@ -2,7 +2,10 @@
 # /// script
 # requires-python = ">=3.9"
 # dependencies = [
-#     "markdown>=3.0.0",
+#     "Mastodon.py",
+#     "markdown-it-py>=3.0",
+#     "orjson>=3.7",
+#     "pygit2>=1.14",
 # ]
 # ///
 """
@@ -12,19 +15,26 @@ This script analyzes ASF repositories to identify new contributors
 who made their first commit in the past 7 days.
 """
 
+import heapq
 import os
+import shutil
 import sys
 import subprocess
-import json
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from collections import defaultdict
 import argparse
 import logging
-import re
-import markdown
+from concurrent.futures import ProcessPoolExecutor
+from markdown_it import MarkdownIt
+import orjson
 from apache_analysis_lib import ApacheAnalysisBase
 
+try:
+    from mastodon import Mastodon
+except ImportError:
+    Mastodon = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -36,305 +46,56 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Where the HTML report is published: an scp destination (user@host:/path/),
+# or file:///path/ for a directory on this machine or a mounted share
+DEFAULT_UPLOAD_TARGET = 'rbowen@fagin:/var/www/vhosts/boxofclue.com/apache-highlights/'
+
+# Access token written by `./mastodon_post.py --setup`
+MASTODON_CREDENTIALS = Path(__file__).resolve().parent / 'mastodon_usercred.secret'
+
+# Let scp ride on an already open SSH connection to the server when there is
+# one, and keep its own connection around briefly for the next upload, rather
+# than paying for a full SSH handshake every time
+SSH_SHARING_OPTIONS = [
+    '-o', 'ControlMaster=auto',
+    '-o', 'ControlPath=~/.ssh/cm-%C',
+    '-o', 'ControlPersist=300',
+]
+
+# CommonMark renderer for the HTML report, with GFM-style tables
+MARKDOWN_RENDERER = MarkdownIt('commonmark').enable('table')
+
+# Page around the rendered report body
+HTML_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>ASF Weekly Highlights</title>
+    <style>
+        body { font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }
+        h1, h2, h3 { color: #333; }
+        pre { background: #f5f5f5; padding: 10px; border-radius: 5px; }
+        table { border-collapse: collapse; width: 100%; }
+        th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+        th { background-color: #f2f2f2; }
+    </style>
+</head>
+<body>
+"""
+HTML_TAIL = """
+</body>
+</html>"""
+
 class ApacheHighlights(ApacheAnalysisBase):
     def __init__(self, base_dir=None):
         super().__init__(base_dir)
         self.report_data = defaultdict(list)
+        # Project -> number of new contributors, for projects that have any
+        self.new_contributor_counts = {}
+        self.upload_target = DEFAULT_UPLOAD_TARGET
         # Use timezone-aware datetime for comparison
         self.cutoff_date = datetime.now(timezone.utc) - timedelta(days=7)
         
-    def update_repository(self, repo_path):
-        """Update a repository with metadata only."""
-        logger.info(f"Updating repository: {repo_path}")
-        
-        # Fetch latest changes (metadata only)
-        result = self.run_git_command(repo_path, ['fetch', '--all'])
-        if result is None:
-            return False
-            
-        # Update all remote tracking branches
-        self.run_git_command(repo_path, ['remote', 'update'])
-        return True
-    
-    def parse_git_date(self, date_str):
-        """Parse git date string and return timezone-aware datetime."""
-        try:
-            # Git ISO format: 2025-01-27 10:30:45 -0800
-            # Remove any extra whitespace and normalize
-            date_str = re.sub(r'\s+', ' ', date_str.strip())
-            
-            # Try to parse with timezone
-            if '+' in date_str or date_str.count('-') > 2:
-                # Has timezone info
-                try:
-                    return datetime.fromisoformat(date_str.replace(' ', 'T'))
-                except ValueError:
-                    # Try alternative parsing
-                    parts = date_str.rsplit(' ', 1)
-                    if len(parts) == 2:
-                        date_part, tz_part = parts
-                        # Convert to ISO format
-                        dt = datetime.fromisoformat(date_part.replace(' ', 'T'))
-                        # For now, just make it UTC (we could parse timezone properly)
-                        return dt.replace(tzinfo=timezone.utc)
-            
-            # No timezone info, assume UTC
-            dt = datetime.fromisoformat(date_str.replace(' ', 'T'))
-            return dt.replace(tzinfo=timezone.utc)
-            
-        except (ValueError, AttributeError) as e:
-            logger.warning(f"Failed to parse date '{date_str}': {e}")
-            # Return a very old date so it won't be considered new
-            return datetime(1970, 1, 1, tzinfo=timezone.utc)
-    
-    def is_bot_or_ci(self, author_name, author_email):
-        """Check if a contributor appears to be a bot or CI system."""
-        # Convert to lowercase for case-insensitive matching
-        name_lower = author_name.lower()
-        email_lower = author_email.lower()
-        
-        # Common bot indicators in names
-        bot_name_patterns = [
-            '[bot]',
-            'jenkins',
-            'ci',
-            'continuous integration',
-            'github-actions',
-            'dependabot',
-            'renovate',
-            'codecov',
-            'travis',
-            'circleci',
-            'appveyor',
-            'buildbot',
-            'automation',
-            'auto-commit'
-        ]
-        
-        # Common bot indicators in emails
-        bot_email_patterns = [
-            'jenkins',
-            'ci@',
-            'automation@',
-            'github-actions',
-            'dependabot',
-            'renovate',
-            'codecov',
-            'travis',
-            'circleci',
-            'appveyor',
-            'buildbot'
-        ]
-        
-        # Check name patterns first
-        for pattern in bot_name_patterns:
-            if pattern in name_lower:
-                return True
-        
-        # Check email patterns
-        for pattern in bot_email_patterns:
-            if pattern in email_lower:
-                return True
-        
-        # Check for specific bot email domains
-        bot_domains = [
-            'dependabot.com',
-            'renovatebot.com',
-            'codecov.io'
-        ]
-        
-        # Handle GitHub noreply addresses carefully
-        if 'users.noreply.github.com' in email_lower:
-            # Check if it's a known bot using this domain by looking for bot indicators in the email
-            if any(bot_indicator in email_lower for bot_indicator in ['dependabot', 'renovate', 'github-actions', 'bot']):
-                return True
-            # Otherwise, it's typically a real user using GitHub's privacy feature
-            return False
-        elif 'noreply.github.com' in email_lower:
-            # This is typically a bot or automated system
-            return True
-        
-        # Check other bot domains
-        for domain in bot_domains:
-            if email_lower.endswith(domain):
-                return True
-        
-        # Additional checks for common bot/CI patterns
-        if any(pattern in name_lower for pattern in ['noreply', 'donotreply', 'no-reply']) or \
-           any(pattern in email_lower for pattern in ['noreply', 'no-reply', 'donotreply']):
-            return True
-        
-        return False
-    
-    def normalize_contributor_identity(self, contributors):
-        """
-        Attempt to resolve contributor identities across different email addresses.
-        This handles cases where the same person uses different email addresses over time.
-        """
-        # Group contributors by normalized name
-        name_groups = defaultdict(list)
-        
-        for email_key, info in contributors.items():
-            # Normalize the name (lowercase, remove extra spaces)
-            normalized_name = ' '.join(info['name'].lower().split())
-            name_groups[normalized_name].append((email_key, info))
-        
-        # For each name group, find the earliest commit across all email addresses
-        resolved_contributors = {}
-        
-        for normalized_name, email_infos in name_groups.items():
-            if len(email_infos) == 1:
-                # Single email for this name, use as-is
-                email_key, info = email_infos[0]
-                resolved_contributors[email_key] = info
-            else:
-                # Multiple emails for the same name - merge all commit data
-                earliest_info = None
-                earliest_email = None
-                earliest_date = None
-                all_commits_merged = []
-                total_commits = 0
-                
-                for email_key, info in email_infos:
-                    # Merge all commits from all email addresses
-                    if 'all_commits' in info:
-                        all_commits_merged.extend(info['all_commits'])
-                    if 'total_commits' in info:
-                        total_commits += info['total_commits']
-                    
-                    # Track the earliest commit across all emails
-                    if earliest_date is None or info['first_commit_date'] < earliest_date:
-                        earliest_date = info['first_commit_date']
-                        earliest_info = info.copy()  # Make a copy to avoid modifying original
-                        earliest_email = email_key
-                
-                # Sort merged commits by date and remove duplicates by hash
-                seen_hashes = set()
-                unique_commits = []
-                for commit in sorted(all_commits_merged, key=lambda x: x['date']):
-                    if commit['hash'] not in seen_hashes:
-                        unique_commits.append(commit)
-                        seen_hashes.add(commit['hash'])
-                
-                # Use the email with the earliest commit, but keep the most recent name
-                most_recent_name = max(email_infos, key=lambda x: x[1]['first_commit_date'])[1]['name']
-                earliest_info['name'] = most_recent_name
-                earliest_info['all_commits'] = unique_commits
-                earliest_info['total_commits'] = len(unique_commits)
-                
-                resolved_contributors[earliest_email] = earliest_info
-                
-                # Log the identity resolution
-                all_emails = [email for email, _ in email_infos]
-                logger.info(f"Resolved identity for '{most_recent_name}': {len(all_emails)} email addresses, {len(unique_commits)} total commits, earliest commit: {earliest_date.strftime('%Y-%m-%d')}")
-        
-        return resolved_contributors
-
-    def get_all_contributors(self, repo_path):
-        """Get all contributors and their first commit dates.
-        
-        This method finds the very first commit ever made by each contributor
-        in the entire history of the repository across all branches, with
-        identity resolution to handle email address changes.
-        """
-        # Get all commits with author info and dates across ALL branches and ALL time
-        log_output = self.run_git_command(repo_path, [
-            'log', '--all', '--pretty=format:%an|%ae|%ad|%H', '--date=iso'
-        ])
-        
-        if not log_output:
-            return {}
-            
-        contributors = {}
-        commit_counts = {}  # Track total commits per contributor
-        
-        for line in log_output.split('\n'):
-            if not line.strip():
-                continue
-                
-            try:
-                parts = line.split('|')
-                if len(parts) != 4:
-                    continue
-                    
-                author_name, author_email, commit_date, commit_hash = parts
-                commit_datetime = self.parse_git_date(commit_date)
-                
-                # Filter out bots and CI systems
-                if self.is_bot_or_ci(author_name, author_email):
-                    continue
-                
-                # Use author email as key to avoid duplicates (same person, different names)
-                key = author_email.lower()
-                
-                # Count commits for this contributor
-                if key not in commit_counts:
-                    commit_counts[key] = []
-                commit_counts[key].append({
-                    'date': commit_datetime,
-                    'hash': commit_hash
-                })
-                
-                if key not in contributors:
-                    contributors[key] = {
-                        'name': author_name,
-                        'email': author_email,
-                        'first_commit_date': commit_datetime,
-                        'first_commit_hash': commit_hash
-                    }
-                else:
-                    # Update if this is an earlier commit (finding the VERY FIRST commit ever)
-                    if commit_datetime < contributors[key]['first_commit_date']:
-                        contributors[key]['first_commit_date'] = commit_datetime
-                        contributors[key]['first_commit_hash'] = commit_hash
-                        # Keep the name from the earliest commit
-                        contributors[key]['name'] = author_name
-                        
-            except (ValueError, IndexError) as e:
-                logger.warning(f"Failed to parse commit line: {line} - {e}")
-                continue
-        
-        # Add commit counts and sort commits by date for each contributor
-        for key in contributors:
-            if key in commit_counts:
-                # Sort commits by date (oldest first)
-                commit_counts[key].sort(key=lambda x: x['date'])
-                contributors[key]['total_commits'] = len(commit_counts[key])
-                contributors[key]['all_commits'] = commit_counts[key]
-            else:
-                contributors[key]['total_commits'] = 0
-                contributors[key]['all_commits'] = []
-        
-        # Apply identity resolution to handle email address changes
-        resolved_contributors = self.normalize_contributor_identity(contributors)
-        
-        return resolved_contributors
-    
-    def get_github_username(self, repo_path, author_name, author_email):
-        """Try to get GitHub username from commit info."""
-        # First try to get GitHub username from recent commits
-        log_output = self.run_git_command(repo_path, [
-            'log', '--all', '--author=' + author_email, 
-            '--pretty=format:%an <%ae>', '-n', '1'
-        ])
-        
-        if log_output:
-            # Check if the name looks like a GitHub username (no spaces, starts with @, etc.)
-            name_part = log_output.split('<')[0].strip()
-            if name_part and not ' ' in name_part and len(name_part) > 1:
-                return name_part
-        
-        # If email is from GitHub, extract username
-        if '@users.noreply.github.com' in author_email:
-            # Format: username@users.noreply.github.com or ID+username@users.noreply.github.com
-            username = author_email.split('@')[0]
-            if '+' in username:
-                username = username.split('+')[1]
-            return username
-        
-        # Return the author name as fallback
-        return author_name
-    
     def analyze_milestones(self, repo_path):
         """Analyze contributors who hit milestone commits (10th, 25th, 50th, 100th, 500th, 1000th) within the time window."""
         repo_name = repo_path.name
@@ -344,34 +105,34 @@ class ApacheHighlights(ApacheAnalysisBase):
         milestones = {10: [], 25: [], 50: [], 100: [], 500: [], 1000: []}
         
         for email_key, info in contributors.items():
-            if 'all_commits' not in info or not info['all_commits']:
+            early_commits = info.get('early_commits')
+            # Commits are sorted oldest first and reach at least up to the
+            # highest milestone, so if the last one kept is older than the
+            # window, no milestone can fall inside it
+            if not early_commits or early_commits[-1].date < self.cutoff_date:
                 continue
+            
+            # The Nth commit is simply early_commits[N - 1]; only look at the
+            # milestones this contributor has actually reached
+            for commit_number, achievers in milestones.items():
+                if commit_number > len(early_commits):
+                    break
                 
-            # Check each commit to see if it represents a milestone within our time window
-            for i, commit in enumerate(info['all_commits']):
-                commit_number = i + 1  # 1-based counting
-                commit_date = commit['date']
-                
-                # Check if this commit falls within our time window and is a milestone
-                if (commit_date >= self.cutoff_date and 
-                    commit_number in milestones and 
-                    commit_number <= info['total_commits']):
-                    
-                    github_username = self.get_github_username(
-                        repo_path, info['name'], info['email']
-                    )
+                commit = early_commits[commit_number - 1]
+                if commit.date >= self.cutoff_date:
+                    github_username = self.get_github_username(info['name'], info['email'])
                     
                     milestone_info = {
                         'name': info['name'],
                         'github_username': github_username,
                         'email': info['email'],
                         'milestone_commit_number': commit_number,
-                        'milestone_commit_date': commit_date.isoformat(),
-                        'milestone_commit_hash': commit['hash'],
+                        'milestone_commit_date': commit.date,
+                        'milestone_commit_hash': commit.hash,
                         'total_commits': info['total_commits']
                     }
                     
-                    milestones[commit_number].append(milestone_info)
+                    achievers.append(milestone_info)
         
         return milestones
 
@@ -390,15 +151,13 @@ class ApacheHighlights(ApacheAnalysisBase):
         for email_key, info in contributors.items():
             # Check if this contributor's FIRST EVER commit was within our time window
             if info['first_commit_date'] >= self.cutoff_date:
-                github_username = self.get_github_username(
-                    repo_path, info['name'], info['email']
-                )
+                github_username = self.get_github_username(info['name'], info['email'])
                 
                 new_contributors.append({
                     'name': info['name'],
                     'github_username': github_username,
                     'email': info['email'],
-                    'first_commit_date': info['first_commit_date'].isoformat(),
+                    'first_commit_date': info['first_commit_date'],
                     'first_commit_hash': info['first_commit_hash']
                 })
         
@@ -417,53 +176,43 @@ class ApacheHighlights(ApacheAnalysisBase):
             logger.error(f"'{target_project}' is not a directory")
             return
         
-        # First, count repositories in this project
-        total_repos = 0
-        if (project_dir / '.git').exists():
+        # Handle both direct repos and project subdirectories
+        if self._is_git_repo(project_dir):
             # Direct repository
-            total_repos = 1
+            repositories = [project_dir]
         else:
             # Project directory containing multiple repos
-            for repo_dir in project_dir.iterdir():
-                if repo_dir.is_dir() and (repo_dir / '.git').exists():
-                    total_repos += 1
+            repositories = [repo_dir for repo_dir in project_dir.iterdir()
+                            if repo_dir.is_dir() and self._is_git_repo(repo_dir)]
+        total_repos = len(repositories)
         
         logger.info(f"Starting repository updates for project: {target_project} ({total_repos} repositories)")
         updated_count = 0
         failed_count = 0
         start_time = time.time()
         
-        # Handle both direct repos and project subdirectories
-        if (project_dir / '.git').exists():
-            # Direct repository
-            if self.update_repository(project_dir):
+        # Fetches run concurrently in the base class, as for all repositories
+        for _, success in self.update_repositories(repositories):
+            if success:
                 updated_count += 1
             else:
                 failed_count += 1
-        else:
-            # Project directory containing multiple repos
-            for repo_dir in project_dir.iterdir():
-                if repo_dir.is_dir() and (repo_dir / '.git').exists():
-                    if self.update_repository(repo_dir):
-                        updated_count += 1
-                    else:
-                        failed_count += 1
-                    
-                    # Progress update with time estimate
-                    completed = updated_count + failed_count
-                    remaining = total_repos - completed
-                    elapsed_time = time.time() - start_time
-                    
-                    if completed > 0 and remaining > 0:
-                        avg_time_per_repo = elapsed_time / completed
-                        estimated_remaining_time = avg_time_per_repo * remaining
-                        
-                        if estimated_remaining_time > 60:
-                            time_str = f"{estimated_remaining_time/60:.1f} minutes"
-                        else:
-                            time_str = f"{estimated_remaining_time:.0f} seconds"
-                        
-                        logger.info(f"Progress: {completed}/{total_repos} repositories updated, {remaining} remaining (est. {time_str})")
+            
+            # Progress update with time estimate
+            completed = updated_count + failed_count
+            remaining = total_repos - completed
+            elapsed_time = time.time() - start_time
+            
+            if completed > 0 and remaining > 0:
+                avg_time_per_repo = elapsed_time / completed
+                estimated_remaining_time = avg_time_per_repo * remaining
+                
+                if estimated_remaining_time > 60:
+                    time_str = f"{estimated_remaining_time/60:.1f} minutes"
+                else:
+                    time_str = f"{estimated_remaining_time:.0f} seconds"
+                
+                logger.info(f"Progress: {completed}/{total_repos} repositories updated, {remaining} remaining (est. {time_str})")
         
         total_time = time.time() - start_time
         if total_time > 60:
@@ -486,8 +235,10 @@ class ApacheHighlights(ApacheAnalysisBase):
         failed_count = 0
         start_time = time.time()
         
-        for repo_path in repositories:
-            if self.update_repository(repo_path):
+        # Fetches run concurrently in the base class; results are counted
+        # here, on the main thread, as they complete
+        for _, success in self.update_repositories(repositories):
+            if success:
                 updated_count += 1
             else:
                 failed_count += 1
@@ -522,7 +273,26 @@ class ApacheHighlights(ApacheAnalysisBase):
         
         logger.info(f"Repository updates complete: {updated_count} updated, {failed_count} failed in {time_str}")
     
-    def analyze_all_repositories(self, target_project=None):
+    def analyze_repositories(self, repo_paths, jobs=None):
+        """Yield (new contributors, milestones) for each repository, in the order given.
+        
+        Repositories are independent, so with more than one job they are
+        analyzed in a pool of worker processes. Workers only return their
+        results; everything is merged here in the parent.
+        """
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+        
+        if jobs <= 1 or len(repo_paths) <= 1:
+            for repo_path in repo_paths:
+                yield self.analyze_repository(repo_path), self.analyze_milestones(repo_path)
+            return
+        
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_analysis_worker,
+                                 initargs=(self.base_dir, self.cutoff_date)) as executor:
+            yield from executor.map(_analyze_in_worker, repo_paths)
+    
+    def analyze_all_repositories(self, target_project=None, jobs=None):
         """Analyze all repositories for new contributors and milestones using improved discovery."""
         if target_project:
             logger.info(f"Starting repository analysis for project: {target_project}")
@@ -552,22 +322,23 @@ class ApacheHighlights(ApacheAnalysisBase):
                     project_repos[project_name] = []
                 project_repos[project_name].append(repo_path)
         
-        # Analyze each project's repositories
+        # Skip other projects if we're targeting a specific one
+        if target_project:
+            project_repos = {name: paths for name, paths in project_repos.items() if name == target_project}
+        
+        # Analyze every repository up front (in parallel), then merge per project
+        results = self.analyze_repositories(
+            [repo_path for repo_paths in project_repos.values() for repo_path in repo_paths], jobs)
+        
         for project_name, repo_paths in project_repos.items():
-            # Skip if we're targeting a specific project and this isn't it
-            if target_project and project_name != target_project:
-                continue
-                
             project_contributors = []
             project_milestones = {10: [], 25: [], 50: [], 100: [], 500: [], 1000: []}
             
-            # Analyze all repositories for this project
+            # Results arrive in the same order as the repositories were listed
             for repo_path in repo_paths:
-                contributors = self.analyze_repository(repo_path)
+                contributors, milestones = next(results)
                 project_contributors.extend(contributors)
                 
-                # Analyze milestones for this repository
-                milestones = self.analyze_milestones(repo_path)
                 for milestone_num in project_milestones:
                     project_milestones[milestone_num].extend(milestones[milestone_num])
             
@@ -579,27 +350,16 @@ class ApacheHighlights(ApacheAnalysisBase):
                     email = contrib['email']
                     if email not in unique_contributors:
                         unique_contributors[email] = contrib
-                    else:
-                        # Keep the earlier first commit
-                        try:
-                            existing_date = datetime.fromisoformat(unique_contributors[email]['first_commit_date'])
-                            new_date = datetime.fromisoformat(contrib['first_commit_date'])
-                            # Ensure both dates are timezone-aware for comparison
-                            if existing_date.tzinfo is None:
-                                existing_date = existing_date.replace(tzinfo=timezone.utc)
-                            if new_date.tzinfo is None:
-                                new_date = new_date.replace(tzinfo=timezone.utc)
-                            if new_date < existing_date:
-                                unique_contributors[email] = contrib
-                        except (ValueError, TypeError) as e:
-                            logger.warning(f"Date comparison failed for {email}: {e}")
-                            # Keep the existing one if we can't compare
+                    elif contrib['first_commit_date'] < unique_contributors[email]['first_commit_date']:
+                        # Keep the earlier first commit (dates are all UTC datetimes)
+                        unique_contributors[email] = contrib
                 
                 # Store both new contributors and milestones
                 self.report_data[project_name] = {
                     'new_contributors': list(unique_contributors.values()),
                     'milestones': project_milestones
                 }
+                self.new_contributor_counts[project_name] = len(unique_contributors)
             elif any(project_milestones[m] for m in project_milestones):
                 # No new contributors but has milestones
                 self.report_data[project_name] = {
@@ -612,6 +372,17 @@ class ApacheHighlights(ApacheAnalysisBase):
         
         logger.info("Repository analysis complete")
     
+    def _report_totals(self):
+        """Return (new contributors, milestone commits) summed over all projects in one pass."""
+        total_new_contributors = 0
+        total_milestones = 0
+        for data in self.report_data.values():
+            total_new_contributors += len(data.get('new_contributors', ()))
+            milestones = data.get('milestones') or {}
+            for m in (10, 25, 50, 100, 500, 1000):
+                total_milestones += len(milestones.get(m, ()))
+        return total_new_contributors, total_milestones
+    
     def generate_report(self, target_project=None):
         """Generate the weekly highlights report."""
         report_date = datetime.now().strftime('%Y-%m-%d')
@@ -626,138 +397,138 @@ class ApacheHighlights(ApacheAnalysisBase):
             report_file = reports_dir / f"apache_highlights_{report_date}.md"
         
         with open(report_file, 'w') as f:
-            f.write(f"# ASF Weekly Highlights - {report_date}\n\n")
-            if target_project:
-                f.write(f"Project: **{target_project}**\n\n")
-            
-            days_back = (datetime.now(timezone.utc) - self.cutoff_date).days
-            f.write(f"Analysis period: past {days_back} days\n\n")
-            f.write(f"Code is here: https://github.com/rbowen/asf-highlights  Patches welcome.\n\n")
-            
-            if not self.report_data:
-                f.write("No new contributors or milestones found in the specified time period.\n")
-                return report_file
+            # One write for the whole report instead of one per line
+            f.write(''.join(self._render_report(report_date, target_project)))
+        
+        logger.info(f"Report generated: {report_file}")
+        return report_file
+    
+    def _render_report(self, report_date, target_project=None):
+        """Return the Markdown report as a list of strings to be joined."""
+        out = [f"# ASF Weekly Highlights - {report_date}\n\n"]
+        if target_project:
+            out.append(f"Project: **{target_project}**\n\n")
+        
+        days_back = (datetime.now(timezone.utc) - self.cutoff_date).days
+        out.append(f"Analysis period: past {days_back} days\n\n")
+        out.append(f"Code is here: https://github.com/rbowen/asf-highlights  Patches welcome.\n\n")
+        
+        if not self.report_data:
+            out.append("No new contributors or milestones found in the specified time period.\n")
+            return out
+        
+        total_new_contributors, total_milestones = self._report_totals()
+        
+        # New Contributors Section
+        out.append(f"## New Contributors\n\n")
+        out.append(f"Contributors who made their **first commit ever** in the past {days_back} days:\n\n")
+        
+        if total_new_contributors == 0:
+            out.append("No new contributors found in the specified time period.\n\n")
+        else:
+            out.append(f"**Total new contributors: {total_new_contributors}**\n\n")
             
-            # Calculate totals
-            total_new_contributors = sum(len(data.get('new_contributors', [])) for data in self.report_data.values())
-            total_milestones = sum(
-                sum(len(milestones.get(m, [])) for m in [10, 25, 50, 100, 500, 1000])
-                for data in self.report_data.values()
-                for milestones in [data.get('milestones', {})]
+            # Sort projects by number of new contributors (descending)
+            sorted_projects = sorted(
+                [(name, data) for name, data in self.report_data.items() if data.get('new_contributors')],
+                key=lambda x: len(x[1]['new_contributors']), 
+                reverse=True
             )
             
-            # New Contributors Section
-            f.write(f"## New Contributors\n\n")
-            f.write(f"Contributors who made their **first commit ever** in the past {days_back} days:\n\n")
+            for project_name, project_data in sorted_projects:
+                out.extend(self._render_project(project_name, project_data['new_contributors']))
+        
+        # Milestones Section
+        out.append(f"## Contributor Milestones\n\n")
+        out.append(f"Contributors who reached milestone commits (10th, 25th, 50th, 100th, 500th, 1000th) in the past {days_back} days:\n\n")
+        
+        if total_milestones == 0:
+            out.append("No milestone commits found in the specified time period.\n\n")
+        else:
+            out.append(f"**Total milestone commits: {total_milestones}**\n\n")
+            
+            # Bucket everyone by milestone number in a single pass over the projects
+            milestone_buckets = defaultdict(list)
+            for project_name, project_data in self.report_data.items():
+                for milestone_num, contribs in (project_data.get('milestones') or {}).items():
+                    milestone_buckets[milestone_num].extend((project_name, contrib) for contrib in contribs)
             
-            if total_new_contributors == 0:
-                f.write("No new contributors found in the specified time period.\n\n")
-            else:
-                f.write(f"**Total new contributors: {total_new_contributors}**\n\n")
-                
-                # Sort projects by number of new contributors (descending)
-                sorted_projects = sorted(
-                    [(name, data) for name, data in self.report_data.items() if data.get('new_contributors')],
-                    key=lambda x: len(x[1]['new_contributors']), 
-                    reverse=True
-                )
+            # Process milestones by milestone number
+            for milestone_num in [1000, 500, 100, 50, 25, 10]:  # Show higher milestones first
+                milestone_contributors = milestone_buckets.get(milestone_num)
                 
-                for project_name, project_data in sorted_projects:
-                    contributors = project_data['new_contributors']
-                    f.write(f"### {project_name} ({len(contributors)} new contributor{'s' if len(contributors) != 1 else ''})\n\n")
+                if milestone_contributors:
+                    out.append(f"### {milestone_num}th Commit Milestone ({len(milestone_contributors)} contributor{'s' if len(milestone_contributors) != 1 else ''})\n\n")
                     
-                    # Sort contributors by first commit date
-                    contributors.sort(key=lambda x: x['first_commit_date'])
+                    # Sort by project name, then by date
+                    milestone_contributors.sort(key=lambda x: (x[0], x[1]['milestone_commit_date']))
                     
-                    for contrib in contributors:
-                        commit_date = datetime.fromisoformat(contrib['first_commit_date']).strftime('%Y-%m-%d')
+                    current_project = None
+                    for project_name, contrib in milestone_contributors:
+                        if project_name != current_project:
+                            if current_project is not None:
+                                out.append("\n")
+                            out.append(f"**{project_name}:**\n")
+                            current_project = project_name
+                        
+                        commit_date = contrib['milestone_commit_date'].strftime('%Y-%m-%d')
                         github_user = contrib['github_username']
                         name = contrib['name']
+                        total_commits = contrib['total_commits']
                         
                         # Format the contributor info
                         if github_user != name and github_user:
-                            f.write(f"- **{github_user}** ({name}) - First commit: {commit_date}\n")
+                            out.append(f"- **{github_user}** ({name}) - {milestone_num}th commit on {commit_date} (total: {total_commits})\n")
                         else:
-                            f.write(f"- **{name}** - First commit: {commit_date}\n")
+                            out.append(f"- **{name}** - {milestone_num}th commit on {commit_date} (total: {total_commits})\n")
                     
-                    f.write("\n")
-            
-            # Milestones Section
-            f.write(f"## Contributor Milestones\n\n")
-            f.write(f"Contributors who reached milestone commits (10th, 25th, 50th, 100th, 500th, 1000th) in the past {days_back} days:\n\n")
-            
-            if total_milestones == 0:
-                f.write("No milestone commits found in the specified time period.\n\n")
-            else:
-                f.write(f"**Total milestone commits: {total_milestones}**\n\n")
-                
-                # Process milestones by milestone number
-                for milestone_num in [1000, 500, 100, 50, 25, 10]:  # Show higher milestones first
-                    milestone_contributors = []
-                    
-                    for project_name, project_data in self.report_data.items():
-                        milestones = project_data.get('milestones', {})
-                        if milestone_num in milestones and milestones[milestone_num]:
-                            for contrib in milestones[milestone_num]:
-                                milestone_contributors.append((project_name, contrib))
-                    
-                    if milestone_contributors:
-                        f.write(f"### {milestone_num}th Commit Milestone ({len(milestone_contributors)} contributor{'s' if len(milestone_contributors) != 1 else ''})\n\n")
-                        
-                        # Sort by project name, then by date
-                        milestone_contributors.sort(key=lambda x: (x[0], x[1]['milestone_commit_date']))
-                        
-                        current_project = None
-                        for project_name, contrib in milestone_contributors:
-                            if project_name != current_project:
-                                if current_project is not None:
-                                    f.write("\n")
-                                f.write(f"**{project_name}:**\n")
-                                current_project = project_name
-                            
-                            commit_date = datetime.fromisoformat(contrib['milestone_commit_date']).strftime('%Y-%m-%d')
-                            github_user = contrib['github_username']
-                            name = contrib['name']
-                            total_commits = contrib['total_commits']
-                            
-                            # Format the contributor info
-                            if github_user != name and github_user:
-                                f.write(f"- **{github_user}** ({name}) - {milestone_num}th commit on {commit_date} (total: {total_commits})\n")
-                            else:
-                                f.write(f"- **{name}** - {milestone_num}th commit on {commit_date} (total: {total_commits})\n")
-                        
-                        f.write("\n")
-            
-            # Add summary graph of top 10 projects with most new contributors
-            f.write("## Summary\n\n")
-            f.write("Top 10 projects by new contributors:\n\n<pre>")
-            
-            # Get projects with new contributors, sorted by count
-            projects_with_contributors = []
-            for project_name, project_data in self.report_data.items():
-                new_contributors = project_data.get('new_contributors', [])
-                if new_contributors:
-                    projects_with_contributors.append((project_name, len(new_contributors)))
-            
-            # Sort by contributor count (descending) and take top 10
-            top_projects = sorted(projects_with_contributors, key=lambda x: x[1], reverse=True)[:10]
+                    out.append("\n")
+        
+        # Add summary graph of top 10 projects with most new contributors
+        out.append("## Summary\n\n")
+        out.append("Top 10 projects by new contributors:\n\n<pre>")
+        
+        # Take the top 10 by contributor count (descending) without sorting them all;
+        # the counts were recorded during analysis
+        top_projects = heapq.nlargest(10, self.new_contributor_counts.items(), key=lambda x: x[1])
+        
+        if top_projects:
+            # Find the maximum count for scaling the graph
+            max_count = max(count for _, count in top_projects)
+            
+            out.append("\n")
+            full_bar = "█" * 40
+            for project_name, count in top_projects:
+                # Create a simple bar chart using characters
+                bar_length = max(1, int((count / max_count) * 40))  # Scale to max 40 characters
+                bar = full_bar[:bar_length]
+                out.append(f"{project_name:20} │{bar} {count}\n")
+            out.append("</pre>\n\n")
+        else:
+            out.append("No projects with new contributors found.\n\n")
+        
+        return out
+    
+    def _render_project(self, project_name, contributors):
+        """Return the new contributors section for one project as a list of strings."""
+        out = [f"### {project_name} ({len(contributors)} new contributor{'s' if len(contributors) != 1 else ''})\n\n"]
+        
+        # Sort contributors by first commit date
+        contributors.sort(key=lambda x: x['first_commit_date'])
+        
+        for contrib in contributors:
+            commit_date = contrib['first_commit_date'].strftime('%Y-%m-%d')
+            github_user = contrib['github_username']
+            name = contrib['name']
             
-            if top_projects:
-                # Find the maximum count for scaling the graph
-                max_count = max(count for _, count in top_projects)
-                
-                f.write("\n")
-                for project_name, count in top_projects:
-                    # Create a simple bar chart using characters
-                    bar_length = max(1, int((count / max_count) * 40))  # Scale to max 40 characters
-                    bar = "█" * bar_length
-                    f.write(f"{project_name:20} │{bar} {count}\n")
-                f.write("</pre>\n\n")
+            # Format the contributor info
+            if github_user != name and github_user:
+                out.append(f"- **{github_user}** ({name}) - First commit: {commit_date}\n")
             else:
-                f.write("No projects with new contributors found.\n\n")
+                out.append(f"- **{name}** - First commit: {commit_date}\n")
         
-        logger.info(f"Report generated: {report_file}")
-        return report_file
+        out.append("\n")
+        return out
     
     def generate_json_report(self, target_project=None):
         """Generate a JSON version of the report for programmatic use."""
@@ -772,13 +543,7 @@ class ApacheHighlights(ApacheAnalysisBase):
         else:
             json_file = reports_dir / f"apache_highlights_{report_date}.json"
         
-        # Calculate totals
-        total_new_contributors = sum(len(data.get('new_contributors', [])) for data in self.report_data.values())
-        total_milestones = sum(
-            sum(len(milestones.get(m, [])) for m in [10, 25, 50, 100, 500, 1000])
-            for data in self.report_data.values()
-            for milestones in [data.get('milestones', {})]
-        )
+        total_new_contributors, total_milestones = self._report_totals()
         
         report_json = {
             'report_date': report_date,
@@ -792,8 +557,10 @@ class ApacheHighlights(ApacheAnalysisBase):
         if target_project:
             report_json['target_project'] = target_project
         
-        with open(json_file, 'w') as f:
-            json.dump(report_json, f, indent=2, default=str)
+        # orjson writes datetimes as ISO 8601 itself; milestones are keyed by int
+        with open(json_file, 'wb') as f:
+            f.write(orjson.dumps(report_json, default=str,
+                                 option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
         
         logger.info(f"JSON report generated: {json_file}")
         return json_file
@@ -807,30 +574,19 @@ class ApacheHighlights(ApacheAnalysisBase):
                 markdown_content = f.read()
             
             # Convert markdown to HTML
-            html_content = markdown.markdown(markdown_content, extensions=['tables'])
+            html_content = MARKDOWN_RENDERER.render(markdown_content)
             
-            # Add basic HTML structure
-            full_html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>ASF Weekly Highlights</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }}
-        h1, h2, h3 {{ color: #333; }}
-        pre {{ background: #f5f5f5; padding: 10px; border-radius: 5px; }}
-        table {{ border-collapse: collapse; width: 100%; }}
-        th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-        th {{ background-color: #f2f2f2; }}
-    </style>
-</head>
-<body>
-{html_content}
-</body>
-</html>"""
-            
-            with open(html_file, 'w') as f:
-                f.write(full_html)
+            # Add basic HTML structure; write it next to the final name and
+            # move it into place, so an upload never sees a half-written page
+            tmp_file = html_file.with_suffix(f'.{os.getpid()}.tmp')
+            try:
+                with open(tmp_file, 'w') as f:
+                    f.write(HTML_HEAD + html_content + HTML_TAIL)
+                os.replace(tmp_file, html_file)
+            except BaseException:
+                # Don't leave a partial page behind in the reports directory
+                tmp_file.unlink(missing_ok=True)
+                raise
             
             logger.info(f"HTML report generated: {html_file}")
             return html_file
@@ -840,25 +596,35 @@ class ApacheHighlights(ApacheAnalysisBase):
             return None
     
     def upload_to_server(self, html_file):
-        """Upload HTML file to server via SCP."""
+        """Upload HTML file to the upload target, via SCP or a local copy."""
         try:
-            # SCP command to upload to fagin server
-            scp_command = [
-                'scp', 
-                str(html_file), 
-                'rbowen@fagin:/var/www/vhosts/boxofclue.com/apache-highlights/'
-            ]
-            
-            result = subprocess.run(scp_command, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                logger.info(f"Successfully uploaded {html_file.name} to server")
+            if self.upload_target.startswith('file://'):
+                # Local directory: a plain (kernel-side) file copy, no SSH involved
+                destination = Path(self.upload_target[len('file://'):]) / html_file.name
+                shutil.copyfile(html_file, destination)
+                logger.info(f"Copied {html_file.name} to {destination}")
+            else:
+                # SCP command to upload to the web server
+                scp_command = [
+                    'scp', *SSH_SHARING_OPTIONS,
+                    str(html_file), 
+                    self.upload_target
+                ]
                 
-                # Post to Mastodon after successful upload
-                self.post_to_mastodon(html_file.name)
+                result = subprocess.run(scp_command, capture_output=True, text=True)
+                
+                if result.returncode != 0:
+                    logger.error(f"Failed to upload to server: {result.stderr}")
+                    return
                 
+                logger.info(f"Successfully uploaded {html_file.name} to {self.upload_target}")
+            
+            # The announcement links to the report as published by the default
+            # upload, so only announce reports that went there
+            if self.upload_target == DEFAULT_UPLOAD_TARGET:
+                self.post_to_mastodon(html_file.name)
             else:
-                logger.error(f"Failed to upload to server: {result.stderr}")
+                logger.info("Not posting to Mastodon: the report was not uploaded to the public server")
                 
         except Exception as e:
             logger.error(f"Error uploading to server: {e}")
@@ -869,6 +635,16 @@ class ApacheHighlights(ApacheAnalysisBase):
             url = f"https://boxofclue.com/apache-highlights/{html_filename}"
             message = f"This week's ASF community highlights: {url}\n\nCode is at https://github.com/rbowen/asf-highlights"
             
+            if Mastodon is not None:
+                # Post from this process rather than starting another
+                # interpreter just to import Mastodon.py and send one request
+                if not MASTODON_CREDENTIALS.exists():
+                    logger.error("Failed to post to Mastodon: not authenticated, run ./mastodon_post.py --setup")
+                    return
+                Mastodon(access_token=str(MASTODON_CREDENTIALS)).toot(message)
+                logger.info("Successfully posted to Mastodon")
+                return
+            
             # Run mastodon_post.py using its virtual environment
             mastodon_command = [
                 'bash', '-c',
@@ -885,7 +661,7 @@ class ApacheHighlights(ApacheAnalysisBase):
         except Exception as e:
             logger.error(f"Error posting to Mastodon: {e}")
     
-    def run(self, update_repos=True, analyze=True, target_project=None):
+    def run(self, update_repos=True, analyze=True, target_project=None, jobs=None):
         """Run the complete highlights analysis."""
         if target_project:
             logger.info(f"Starting ASF Highlights analysis for project: {target_project}")
@@ -900,7 +676,7 @@ class ApacheHighlights(ApacheAnalysisBase):
                 self.update_all_repositories()
         
         if analyze:
-            self.analyze_all_repositories(target_project)
+            self.analyze_all_repositories(target_project, jobs)
             markdown_report = self.generate_report(target_project)
             json_report = self.generate_json_report(target_project)
             
@@ -917,6 +693,18 @@ class ApacheHighlights(ApacheAnalysisBase):
         
         return None, None
 
+# Per-process analyzer used by analysis worker processes
+_worker_highlights = None
+
+def _init_analysis_worker(base_dir, cutoff_date):
+    global _worker_highlights
+    _worker_highlights = ApacheHighlights(base_dir)
+    _worker_highlights.cutoff_date = cutoff_date
+
+def _analyze_in_worker(repo_path):
+    return (_worker_highlights.analyze_repository(repo_path),
+            _worker_highlights.analyze_milestones(repo_path))
+
 def main():
     parser = argparse.ArgumentParser(description='ASF Weekly Highlights Generator')
     parser.add_argument('--no-update', action='store_true', 
@@ -927,17 +715,23 @@ def main():
                        help='Number of days to look back for new contributors')
     parser.add_argument('--project', type=str,
                        help='Analyze only a specific project (e.g., spark, flink)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                       help='Number of repositories to analyze in parallel (default: CPU count)')
+    parser.add_argument('--upload-target', type=str, default=DEFAULT_UPLOAD_TARGET,
+                       help='Where to publish the HTML report: user@host:/path/ for scp, '
+                            'or file:///path/ to copy it to a local directory')
     
     args = parser.parse_args()
     
     highlights = ApacheHighlights(args.base_dir)
+    highlights.upload_target = args.upload_target
     
     # Override cutoff date if specified
     if args.days != 7:
         highlights.cutoff_date = datetime.now(timezone.utc) - timedelta(days=args.days)
     
     try:
-        highlights.run(update_repos=not args.no_update, target_project=args.project)
+        highlights.run(update_repos=not args.no_update, target_project=args.project, jobs=args.jobs)
     except KeyboardInterrupt:
         logger.info("Analysis interrupted by user")
         sys.exit(1)